@@ -5,22 +5,469 @@ import docx
 import pandas as pd
 import re
 import os
+import sys
+import io
+import copy
+import hashlib
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+import subprocess
+from contextlib import contextmanager
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
+from types import SimpleNamespace
+
+# Optional OCR dependencies for image-only PDFs (also needs the tesseract and poppler binaries)
+try:
+    import ocr_worker
+    OCR_AVAILABLE = True
+except ImportError:
+    OCR_AVAILABLE = False
 
 # Set API key from environment variable for security
 CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY")
 
-def extract_text_from_file(file):
+# Record/replay of Claude responses for offline regression and performance testing:
+# "off" calls the API, "record" also saves responses to the cassette file, "replay" serves them back
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off").lower()
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "llm_cassettes.jsonl")
+# Simulated latency in replay mode: milliseconds, or "recorded" to reuse the recorded latency
+LLM_REPLAY_LATENCY = os.getenv("LLM_REPLAY_LATENCY", "0")
+CASSETTES = None
+CASSETTE_LOCK = threading.Lock()
+CASSETTE_DRIFT = {}
+
+# Replay mode serves recorded responses, so it works without an API key
+LLM_AVAILABLE = bool(CLAUDE_API_KEY) or LLM_CASSETTE_MODE == "replay"
+
+# SQLite file shared by all worker processes for the result/OCR caches, rate limiter and job slots.
+# When unset, state is kept in memory for this process only.
+SHARED_STATE_DB = os.getenv("SHARED_STATE_DB")
+SHARED_STATE_LOCAL = threading.local()
+
+# Analysis results keyed by resume text hash + job spec hash, shared across sessions
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", 500))
+LOCAL_CACHES = {"results": OrderedDict(), "ocr": OrderedDict()}
+LOCAL_CACHE_LOCK = threading.Lock()
+
+# Claude API calls allowed per minute across all workers (0 disables the limit)
+CLAUDE_REQUESTS_PER_MINUTE = int(os.getenv("CLAUDE_REQUESTS_PER_MINUTE", 0))
+API_CALL_TIMES = deque()
+API_CALL_LOCK = threading.Lock()
+
+# Batch analyses allowed to run at once across all workers (0 disables the limit)
+MAX_CONCURRENT_BATCHES = int(os.getenv("MAX_CONCURRENT_BATCHES", 0))
+# Slot leases are renewed while the batch runs, so this only bounds how long a crashed worker holds a slot
+BATCH_LEASE_SECONDS = int(os.getenv("BATCH_LEASE_SECONDS", 120))
+BATCH_SEMAPHORE = threading.BoundedSemaphore(MAX_CONCURRENT_BATCHES) if MAX_CONCURRENT_BATCHES > 0 else None
+
+# (kind, session hash) pairs with an event in flight; each browser session runs one analysis
+# and one re-score at a time so a single user can't fill the shared analysis slots
+ACTIVE_SESSION_EVENTS = set()
+ACTIVE_SESSION_LOCK = threading.Lock()
+
+# Gradio queue settings for the serving mode
+ANALYSIS_CONCURRENCY_LIMIT = int(os.getenv("ANALYSIS_CONCURRENCY_LIMIT", 4))
+UI_CONCURRENCY_LIMIT = int(os.getenv("UI_CONCURRENCY_LIMIT", 16))
+QUEUE_MAX_SIZE = int(os.getenv("QUEUE_MAX_SIZE", 100))
+# Number of Gradio worker processes started by `python app.py` (see run_workers)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 1))
+
+# Number of rows re-scored in parallel after the job description changes
+RESCORE_WORKERS = int(os.getenv("RESCORE_WORKERS", 4))
+
+# Pages with less extracted text than this are treated as scanned and sent to OCR
+OCR_MIN_PAGE_CHARS = int(os.getenv("OCR_MIN_PAGE_CHARS", 20))
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", 2))
+OCR_TIME_BUDGET_SECONDS = float(os.getenv("OCR_TIME_BUDGET_SECONDS", 60))
+OCR_DPI = int(os.getenv("OCR_DPI", 200))
+OCR_CACHE_MAX_ENTRIES = int(os.getenv("OCR_CACHE_MAX_ENTRIES", 200))
+# Extra wait after the budget for pages to report back once their OCR processes are killed
+OCR_GRACE_SECONDS = 5
+OCR_EXECUTOR = None
+OCR_EXECUTOR_LOCK = threading.Lock()
+
+STALE_RESULT = "STALE"
+STALE_REASON = "Job description changed - re-scoring in progress..."
+
+COLUMN_ORDER = ["File", "Name", "Email", "Phone", "Current Company", "Current Role", "Experience",
+                "Job Desc Score", "Designation Score", "Final Score", "Result", "Reason"]
+
+ANALYTICS_CATEGORIES = ["GOOD MATCH", "CONSIDERABLE MATCH", "REJECT", "OTHER"]
+ANALYTICS_TOP_COMPANIES = 5
+ANALYTICS_BAR_WIDTH = 20
+
+def new_analytics():
+    """Running aggregates behind the analytics panel, updated as rows are added or removed"""
+    return {
+        "results": {category: 0 for category in ANALYTICS_CATEGORIES},
+        "score_histogram": [0] * 11, "score_sum": 0.0, "score_count": 0,
+        "experience_sum": 0.0, "experience_count": 0,
+        # Companies grouped by count, buckets linked in count order so the top companies are read in O(k)
+        "companies": {}, "company_buckets": {}, "highest_company_count": None, "lowest_company_count": None,
+        "rows": {}
+    }
+
+# Gradio hands every event the same session state object, so concurrent events
+# (analysis, background re-scoring, deletes) mutate it under this lock
+SESSION_LOCK = threading.RLock()
+
+def new_session_state():
+    """Per-session state: result rows by filename, extracted text, the job spec hash each file was scored with,
+    the latest (job title, responsibilities) rows were checked against, and analytics"""
+    return {"records": {}, "texts": {}, "scored_with": {}, "job_spec": None, "analytics": new_analytics()}
+
+def compute_text_hash(text):
+    return hashlib.sha256(text.encode('utf-8', errors='ignore')).hexdigest()
+
+def compute_job_spec_hash(job_title, job_responsibilities):
+    """Hash of the job title and responsibilities used to detect job spec edits"""
+    spec = f"{(job_title or '').strip()}\n{(job_responsibilities or '').strip()}"
+    return compute_text_hash(spec)
+
+def get_shared_db():
+    """Per-thread connection to the shared state database, creating tables on first use"""
+    conn = getattr(SHARED_STATE_LOCAL, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(SHARED_STATE_DB, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS cache (namespace TEXT, key TEXT, value TEXT, accessed_at REAL, "
+                     "PRIMARY KEY (namespace, key))")
+        conn.execute("CREATE TABLE IF NOT EXISTS api_calls (called_at REAL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS active_batches (batch_id TEXT PRIMARY KEY, started_at REAL)")
+        SHARED_STATE_LOCAL.conn = conn
+    return conn
+
+def cache_get(namespace, key):
+    """Look up a cached value, from the shared database if configured"""
+    if SHARED_STATE_DB:
+        conn = get_shared_db()
+        row = conn.execute("SELECT value FROM cache WHERE namespace = ? AND key = ?", (namespace, key)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?", (time.time(), namespace, key))
+        return json.loads(row[0])
+    
+    with LOCAL_CACHE_LOCK:
+        cache = LOCAL_CACHES[namespace]
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return copy.deepcopy(value)
+
+def cache_set(namespace, key, value, max_entries):
+    """Store a value and evict the least recently used entries beyond max_entries"""
+    if SHARED_STATE_DB:
+        conn = get_shared_db()
+        conn.execute("INSERT OR REPLACE INTO cache (namespace, key, value, accessed_at) VALUES (?, ?, ?, ?)",
+                     (namespace, key, json.dumps(value), time.time()))
+        conn.execute("DELETE FROM cache WHERE namespace = ? AND key NOT IN "
+                     "(SELECT key FROM cache WHERE namespace = ? ORDER BY accessed_at DESC LIMIT ?)",
+                     (namespace, namespace, max_entries))
+        return
+    
+    with LOCAL_CACHE_LOCK:
+        cache = LOCAL_CACHES[namespace]
+        cache[key] = copy.deepcopy(value)
+        cache.move_to_end(key)
+        while len(cache) > max_entries:
+            cache.popitem(last=False)
+
+def acquire_api_slot():
+    """Block until a Claude API call is allowed by the per-minute rate limit"""
+    if CLAUDE_REQUESTS_PER_MINUTE <= 0:
+        return
+    
+    while True:
+        now = time.time()
+        if SHARED_STATE_DB:
+            conn = get_shared_db()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM api_calls WHERE called_at <= ?", (now - 60,))
+                count, oldest = conn.execute("SELECT COUNT(*), MIN(called_at) FROM api_calls").fetchone()
+                if count < CLAUDE_REQUESTS_PER_MINUTE:
+                    conn.execute("INSERT INTO api_calls (called_at) VALUES (?)", (now,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        else:
+            with API_CALL_LOCK:
+                while API_CALL_TIMES and API_CALL_TIMES[0] <= now - 60:
+                    API_CALL_TIMES.popleft()
+                count = len(API_CALL_TIMES)
+                oldest = API_CALL_TIMES[0] if API_CALL_TIMES else now
+                if count < CLAUDE_REQUESTS_PER_MINUTE:
+                    API_CALL_TIMES.append(now)
+        
+        if count < CLAUDE_REQUESTS_PER_MINUTE:
+            return
+        time.sleep(max(oldest + 60 - now, 0.1))
+
+@contextmanager
+def batch_slot():
+    """Hold one of the MAX_CONCURRENT_BATCHES slots while a batch is analyzed"""
+    if MAX_CONCURRENT_BATCHES <= 0:
+        yield
+        return
+    
+    if not SHARED_STATE_DB:
+        with BATCH_SEMAPHORE:
+            yield
+        return
+    
+    batch_id = f"{os.getpid()}-{threading.get_ident()}-{time.time()}"
+    conn = get_shared_db()
+    while True:
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Leases expire so a crashed worker can't hold a slot forever
+            conn.execute("DELETE FROM active_batches WHERE started_at <= ?", (now - BATCH_LEASE_SECONDS,))
+            count = conn.execute("SELECT COUNT(*) FROM active_batches").fetchone()[0]
+            if count < MAX_CONCURRENT_BATCHES:
+                conn.execute("INSERT INTO active_batches (batch_id, started_at) VALUES (?, ?)", (batch_id, now))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if count < MAX_CONCURRENT_BATCHES:
+            break
+        time.sleep(0.5)
+    
+    stop_renewing = threading.Event()
+    
+    def renew_lease():
+        while not stop_renewing.wait(BATCH_LEASE_SECONDS / 3):
+            get_shared_db().execute("UPDATE active_batches SET started_at = ? WHERE batch_id = ?", (time.time(), batch_id))
+    
+    threading.Thread(target=renew_lease, daemon=True).start()
+    try:
+        yield
+    finally:
+        stop_renewing.set()
+        conn.execute("DELETE FROM active_batches WHERE batch_id = ?", (batch_id,))
+
+@contextmanager
+def session_admission(request, kind):
+    """Yield whether this session may start a `kind` event now (False while its previous one is running)"""
+    session_hash = getattr(request, "session_hash", None)
+    if session_hash is None:
+        yield True
+        return
+    
+    slot = (kind, session_hash)
+    with ACTIVE_SESSION_LOCK:
+        admitted = slot not in ACTIVE_SESSION_EVENTS
+        if admitted:
+            ACTIVE_SESSION_EVENTS.add(slot)
+    
+    try:
+        yield admitted
+    finally:
+        if admitted:
+            with ACTIVE_SESSION_LOCK:
+                ACTIVE_SESSION_EVENTS.discard(slot)
+
+def get_analysis_cache_key(resume_text, job_title, job_responsibilities):
+    return f"{compute_text_hash(resume_text)}:{compute_job_spec_hash(job_title, job_responsibilities)}"
+
+def load_cassettes():
+    """Load recorded responses keyed by analysis cache key (later recordings win)"""
+    global CASSETTES
+    with CASSETTE_LOCK:
+        if CASSETTES is None:
+            CASSETTES = {}
+            if os.path.exists(LLM_CASSETTE_PATH):
+                with open(LLM_CASSETTE_PATH, encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            CASSETTES[entry["key"]] = entry
+        return CASSETTES
+
+def record_cassette(entry):
+    with CASSETTE_LOCK:
+        with open(LLM_CASSETTE_PATH, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+        if CASSETTES is not None:
+            CASSETTES[entry["key"]] = entry
+
+def cassette_drift_report():
+    """Describe replayed calls whose prompt text changed since they were recorded"""
+    if not CASSETTE_DRIFT:
+        return "No prompt drift detected"
+    lines = [f"Prompt drift in {len(CASSETTE_DRIFT)} replayed calls (re-record to refresh):"]
+    for key, drift in CASSETTE_DRIFT.items():
+        lines.append(f"  {key[:16]}... recorded {drift['recorded'][:12]}, current {drift['current'][:12]}")
+    return "\n".join(lines)
+
+def create_client():
+    """Create the Claude client, or None in replay mode where no API calls are made"""
+    if LLM_CASSETTE_MODE == "replay":
+        return None
+    return anthropic.Anthropic(api_key=CLAUDE_API_KEY)
+
+def create_message(client, cassette_key, **request):
+    """client.messages.create with record/replay support, keyed by resume text and job spec"""
+    prompt_hash = compute_text_hash(json.dumps(request, sort_keys=True))
+    
+    if LLM_CASSETTE_MODE == "replay":
+        entry = load_cassettes().get(cassette_key)
+        if entry is None:
+            raise LookupError(f"No recorded response in {LLM_CASSETTE_PATH} for this resume and job description")
+        if entry["prompt_hash"] != prompt_hash:
+            with CASSETTE_LOCK:
+                if cassette_key not in CASSETTE_DRIFT:
+                    print(f"⚠️ Prompt drift for cassette {cassette_key[:16]}...: prompt changed since recording")
+                CASSETTE_DRIFT[cassette_key] = {"recorded": entry["prompt_hash"], "current": prompt_hash}
+        latency_ms = entry.get("latency_ms", 0) if LLM_REPLAY_LATENCY == "recorded" else float(LLM_REPLAY_LATENCY)
+        if latency_ms > 0:
+            time.sleep(latency_ms / 1000)
+        return SimpleNamespace(content=[SimpleNamespace(text=entry["response_text"])])
+    
+    start = time.perf_counter()
+    message = client.messages.create(**request)
+    if LLM_CASSETTE_MODE == "record":
+        record_cassette({
+            "key": cassette_key, "prompt_hash": prompt_hash, "model": request.get("model"),
+            "response_text": message.content[0].text,
+            "latency_ms": round((time.perf_counter() - start) * 1000),
+            "recorded_at": datetime.now().isoformat()
+        })
+    return message
+
+def read_file_bytes(file):
+    """Read raw bytes from an uploaded file object or file path"""
+    if hasattr(file, 'read'):
+        file.seek(0)
+        content = file.read()
+        file.seek(0)
+        return content
+    with open(file, 'rb') as f:
+        return f.read()
+
+def get_ocr_executor():
+    """Lazily create the OCR pool; each task drives pdftoppm/tesseract child processes"""
+    global OCR_EXECUTOR
+    with OCR_EXECUTOR_LOCK:
+        if OCR_EXECUTOR is None:
+            OCR_EXECUTOR = ThreadPoolExecutor(max_workers=OCR_WORKERS, thread_name_prefix="ocr")
+        return OCR_EXECUTOR
+
+def warm_ocr_pool():
+    """Start the OCR pool at startup and turn OCR off if the tesseract binary is missing"""
+    global OCR_AVAILABLE
+    if not OCR_AVAILABLE:
+        return
+    try:
+        version = get_ocr_executor().submit(ocr_worker.check_ocr_engine).result()
+        print(f"🔤 OCR enabled (Tesseract {version}, {OCR_WORKERS} workers)")
+    except Exception as e:
+        OCR_AVAILABLE = False
+        print(f"⚠️ OCR disabled: {str(e)}")
+
+def new_ocr_clock():
+    """OCR time budget shared by the files of one batch; it starts when the batch's first page starts OCR"""
+    return {"deadline": None, "lock": threading.Lock()}
+
+def start_ocr_clock(ocr_clock):
+    with ocr_clock["lock"]:
+        if ocr_clock["deadline"] is None:
+            ocr_clock["deadline"] = time.monotonic() + OCR_TIME_BUDGET_SECONDS
+        return ocr_clock["deadline"]
+
+def ocr_pdf_pages(pdf_bytes, page_indices, ocr_clock=None):
+    """OCR the given pages in parallel within the OCR time budget, cached by file hash.
+
+    Time spent queued behind other uploads' pages doesn't count against the budget.
+    Returns the page texts and whether every page finished within the budget.
+    """
+    file_hash = hashlib.sha256(pdf_bytes).hexdigest()
+    
+    cached = cache_get("ocr", file_hash)
+    if cached is not None:
+        return {int(page_index): text for page_index, text in cached.items()}, True
+    
+    if ocr_clock is None:
+        ocr_clock = new_ocr_clock()
+    
+    def ocr_page(page_index):
+        # Pages that only start after the deadline return None straight away
+        return ocr_worker.ocr_pdf_page(pdf_bytes, page_index, OCR_DPI, start_ocr_clock(ocr_clock))
+    
+    executor = get_ocr_executor()
+    futures = {executor.submit(ocr_page, page_index): page_index for page_index in page_indices}
+    pending = set(futures)
+    while pending:
+        deadline = ocr_clock["deadline"]
+        if deadline is None:
+            _, pending = wait(pending, timeout=1)
+            continue
+        remaining = deadline + OCR_GRACE_SECONDS - time.monotonic()
+        if remaining <= 0:
+            break
+        _, pending = wait(pending, timeout=remaining)
+    
+    page_texts = {}
+    complete = not pending
+    for future, page_index in futures.items():
+        if future in pending:
+            continue
+        try:
+            text = future.result()
+        except Exception:
+            # Poppler or Tesseract failed on this page, e.g. a corrupt image
+            text = ""
+        if text is None:
+            complete = False
+            text = ""
+        page_texts[page_index] = text
+    
+    # Only cache complete results so timed out pages are retried on the next upload
+    if complete:
+        cache_set("ocr", file_hash, {str(page_index): text for page_index, text in page_texts.items()}, OCR_CACHE_MAX_ENTRIES)
+    
+    return page_texts, complete
+
+def extract_text_from_pdf(file, ocr_clock=None):
+    """Extract PDF text, falling back to OCR for pages with little or no text layer"""
+    pdf_bytes = read_file_bytes(file)
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    page_texts = [page.extract_text() or "" for page in pdf_reader.pages]
+    
+    sparse_pages = [idx for idx, text in enumerate(page_texts) if len(text.strip()) < OCR_MIN_PAGE_CHARS]
+    ocr_complete = True
+    if sparse_pages and OCR_AVAILABLE:
+        ocr_texts, ocr_complete = ocr_pdf_pages(pdf_bytes, sparse_pages, ocr_clock)
+        for idx, ocr_text in ocr_texts.items():
+            if len(ocr_text.strip()) > len(page_texts[idx].strip()):
+                page_texts[idx] = ocr_text
+    
+    text = "\n".join(page_texts)
+    # Don't send near-empty prompts to Claude, they only produce a bogus REJECT
+    if len(text.strip()) < OCR_MIN_PAGE_CHARS:
+        if not OCR_AVAILABLE:
+            reason = "no text layer found (scanned PDF, OCR not installed)"
+        elif not ocr_complete:
+            reason = f"OCR did not finish within the {OCR_TIME_BUDGET_SECONDS:g}s time budget"
+        else:
+            reason = "no readable text found, even with OCR"
+        return f"Error reading {os.path.basename(file.name)}: {reason}"
+    return text + "\n"
+
+def extract_text_from_file(file, ocr_clock=None):
     if file is None:
         return ""
     file_extension = file.name.lower().split('.')[-1]
     try:
         if file_extension == 'pdf':
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text
+            return extract_text_from_pdf(file, ocr_clock)
         elif file_extension in ['docx', 'doc']:
             doc = docx.Document(file)
             text = ""
@@ -28,7 +475,7 @@ def extract_text_from_file(file):
                 text += paragraph.text + "\n"
             return text
         elif file_extension == 'txt':
-            content = file.read()
+            content = read_file_bytes(file)
             if isinstance(content, bytes):
                 return content.decode('utf-8')
             return content
@@ -100,7 +547,8 @@ REASON: [One sentence explaining the scoring and decision]
 If any information is not available in the resume, write "Not Available" for that field."""
     
     try:
-        message = client.messages.create(
+        message = create_message(
+            client, get_analysis_cache_key(resume_text, job_title, job_responsibilities),
             model="claude-3-sonnet-20240229",
             max_tokens=4000,
             messages=[{"role": "user", "content": prompt}]
@@ -152,6 +600,169 @@ If any information is not available in the resume, write "Not Available" for tha
                               "Reason": f"API Error: {str(e)}", "File": filename}
         }
 
+def get_cached_analysis(client, resume_text, job_title, job_responsibilities, filename):
+    """Return a cached analysis for this resume text and job spec, calling Claude on a miss"""
+    cache_key = get_analysis_cache_key(resume_text, job_title, job_responsibilities)
+    
+    cached = cache_get("results", cache_key)
+    if cached is not None:
+        candidate_data = cached
+        candidate_data["File"] = os.path.basename(filename)
+        candidate_data["_original_data"]["File"] = os.path.basename(filename)
+        return candidate_data
+    
+    acquire_api_slot()
+    candidate_data = analyze_single_resume(client, resume_text, job_title, job_responsibilities, filename)
+    
+    # Don't cache API errors so they are retried on the next run
+    if candidate_data.get("Result") != "Error":
+        cache_set("results", cache_key, candidate_data, RESULT_CACHE_MAX_ENTRIES)
+    
+    return candidate_data
+
+def parse_number(value):
+    match = re.search(r"\d+(?:\.\d+)?", str(value))
+    return float(match.group()) if match else None
+
+def get_row_contribution(record):
+    """Parse a candidate row once into the values it adds to the analytics aggregates"""
+    result = str(record.get("Result", "")).upper()
+    category = next((c for c in ANALYTICS_CATEGORIES[:3] if c in result), "OTHER")
+    
+    score = parse_number(record.get("Final Score")) if category != "OTHER" else None
+    if score is not None:
+        score = min(max(score, 0.0), 10.0)
+    
+    experience = parse_number(record.get("Experience")) if category != "OTHER" else None
+    if experience is not None and "month" in str(record.get("Experience", "")).lower() \
+            and "year" not in str(record.get("Experience", "")).lower():
+        experience = experience / 12
+    
+    company = str(record.get("Current Company", "")).strip()
+    if category == "OTHER" or company in ["", "Not Available", "N/A", "Error"]:
+        company = None
+    
+    return {"category": category, "score": score, "experience": experience, "company": company}
+
+def apply_row_contribution(analytics, contribution, sign):
+    analytics["results"][contribution["category"]] += sign
+    if contribution["score"] is not None:
+        analytics["score_histogram"][int(contribution["score"])] += sign
+        analytics["score_sum"] += sign * contribution["score"]
+        analytics["score_count"] += sign
+    if contribution["experience"] is not None:
+        analytics["experience_sum"] += sign * contribution["experience"]
+        analytics["experience_count"] += sign
+    if contribution["company"] is not None:
+        shift_company_count(analytics, contribution["company"], sign)
+
+def link_company_bucket(analytics, count, lower, higher):
+    buckets = analytics["company_buckets"]
+    buckets[count] = {"companies": {}, "lower": lower, "higher": higher}
+    if lower is None:
+        analytics["lowest_company_count"] = count
+    else:
+        buckets[lower]["higher"] = count
+    if higher is None:
+        analytics["highest_company_count"] = count
+    else:
+        buckets[higher]["lower"] = count
+
+def unlink_company_bucket(analytics, count):
+    buckets = analytics["company_buckets"]
+    bucket = buckets.pop(count)
+    if bucket["lower"] is None:
+        analytics["lowest_company_count"] = bucket["higher"]
+    else:
+        buckets[bucket["lower"]]["higher"] = bucket["higher"]
+    if bucket["higher"] is None:
+        analytics["highest_company_count"] = bucket["lower"]
+    else:
+        buckets[bucket["higher"]]["lower"] = bucket["lower"]
+
+def shift_company_count(analytics, company, sign):
+    """Move a company to the bucket one count up or down; counts change by one, so this is O(1)"""
+    companies = analytics["companies"]
+    buckets = analytics["company_buckets"]
+    old_count = companies.get(company, 0)
+    new_count = old_count + sign
+    
+    if new_count > 0 and new_count not in buckets:
+        if old_count == 0:
+            link_company_bucket(analytics, new_count, None, analytics["lowest_company_count"])
+        elif sign > 0:
+            link_company_bucket(analytics, new_count, old_count, buckets[old_count]["higher"])
+        else:
+            link_company_bucket(analytics, new_count, buckets[old_count]["lower"], old_count)
+    
+    if old_count > 0:
+        del buckets[old_count]["companies"][company]
+        if not buckets[old_count]["companies"]:
+            unlink_company_bucket(analytics, old_count)
+    
+    if new_count > 0:
+        buckets[new_count]["companies"][company] = None
+        companies[company] = new_count
+    else:
+        companies.pop(company, None)
+
+def get_top_companies(analytics, limit):
+    """(company, count) pairs for the most common companies, walking down from the highest bucket"""
+    top_companies = []
+    count = analytics["highest_company_count"]
+    while count is not None and len(top_companies) < limit:
+        bucket = analytics["company_buckets"][count]
+        for company in bucket["companies"]:
+            top_companies.append((company, count))
+            if len(top_companies) == limit:
+                break
+        count = bucket["lower"]
+    return top_companies
+
+def remove_row_stats(session_state, filename):
+    """Subtract a row's stored contribution from the analytics aggregates"""
+    analytics = session_state["analytics"]
+    contribution = analytics["rows"].pop(filename, None)
+    if contribution is not None:
+        apply_row_contribution(analytics, contribution, -1)
+
+def update_row_stats(session_state, filename, record):
+    """Add a new or replaced row to the analytics aggregates"""
+    remove_row_stats(session_state, filename)
+    contribution = get_row_contribution(record)
+    apply_row_contribution(session_state["analytics"], contribution, 1)
+    session_state["analytics"]["rows"][filename] = contribution
+
+def render_analytics(session_state, job_title):
+    """Render the analytics panel from the running aggregates without touching the results table"""
+    analytics = (session_state or new_session_state())["analytics"]
+    total = len(analytics["rows"])
+    if total == 0:
+        return "*No candidates analyzed yet*"
+    
+    results = analytics["results"]
+    avg_score = f"{analytics['score_sum'] / analytics['score_count']:.1f}/10" if analytics["score_count"] else "N/A"
+    avg_experience = (f"{analytics['experience_sum'] / analytics['experience_count']:.1f} years"
+                      if analytics["experience_count"] else "N/A")
+    
+    lines = [f"**Job Posting:** {job_title.strip() or 'Untitled'}",
+             f"**Candidates:** {total} | 🟢 {results['GOOD MATCH']} Good | 🟠 {results['CONSIDERABLE MATCH']} Considerable | "
+             f"🔴 {results['REJECT']} Reject | ⚪ {results['OTHER']} Errors/Pending",
+             f"**Average Final Score:** {avg_score} | **Average Experience:** {avg_experience}",
+             "", "**Score Distribution:**", "```"]
+    # Bars are scaled to the largest bin so the panel stays the same size however many candidates there are
+    largest_bin = max(analytics["score_histogram"])
+    for score_bin, count in enumerate(analytics["score_histogram"]):
+        bar_length = max(round(count / largest_bin * ANALYTICS_BAR_WIDTH), 1) if count else 0
+        lines.append(f"{score_bin:>2} | {'█' * bar_length} {count}")
+    lines.append("```")
+    
+    top_companies = get_top_companies(analytics, ANALYTICS_TOP_COMPANIES)
+    if top_companies:
+        lines.append("**Top Current Companies:** " + " | ".join(f"{company} ({count})" for company, count in top_companies))
+    
+    return "\n".join(lines)
+
 def add_color_indicators_and_delete_buttons(df):
     """Add color indicators to File Name and delete buttons to each row"""
     if df is None or df.empty:
@@ -227,13 +838,16 @@ def hide_fullscreen_table():
     """Hide fullscreen table"""
     return gr.update(visible=False)
 
-def delete_row_by_index(df, row_index):
+def delete_row_by_index(df, row_index, session_state):
     """Delete a specific row by index"""
+    if session_state is None:
+        session_state = new_session_state()
+    
     if df is None or df.empty:
-        return df, "No data to delete"
+        return df, "No data to delete", session_state
     
     if row_index < 0 or row_index >= len(df):
-        return df, "Invalid row selection"
+        return df, "Invalid row selection", session_state
     
     try:
         # Get the filename of the row being deleted for confirmation
@@ -242,138 +856,194 @@ def delete_row_by_index(df, row_index):
             filename = str(df.iloc[row_index]['File'])
             filename = re.sub(r'^[🟢🟠🔴⚪] ', '', filename)  # Remove color indicators
         
-        # Remove the row
-        df_new = df.drop(df.index[row_index]).reset_index(drop=True)
-        
-        # Re-add delete buttons with correct indices
-        if not df_new.empty:
-            df_new = add_color_indicators_and_delete_buttons(df_new.drop('Del', axis=1) if 'Del' in df_new.columns else df_new)
+        with SESSION_LOCK:
+            if filename in session_state["records"]:
+                remove_session_record(session_state, filename)
+                # Render from the session records so results merged in the background are kept
+                records = list(session_state["records"].values())
+                df_new = build_results_table(records) if records else pd.DataFrame()
+            else:
+                # Remove the row
+                df_new = df.drop(df.index[row_index]).reset_index(drop=True)
+                
+                # Re-add delete buttons with correct indices
+                if not df_new.empty:
+                    df_new = add_color_indicators_and_delete_buttons(df_new.drop('Del', axis=1) if 'Del' in df_new.columns else df_new)
         
-        return df_new, f"Successfully deleted candidate: {filename}"
+        return df_new, f"Successfully deleted candidate: {filename}", session_state
     except Exception as e:
-        return df, f"Error deleting row: {str(e)}"
+        return df, f"Error deleting row: {str(e)}", session_state
 
-def handle_dataframe_select(df, evt: gr.SelectData):
+def handle_dataframe_select(df, session_state, evt: gr.SelectData):
     """Handle dataframe cell selection for delete functionality"""
     if df is None or df.empty:
-        return df, ""
+        return df, "", session_state
     
     row_idx = evt.index[0]  # Get row index
     col_idx = evt.index[1]  # Get column index
     
     # Check if the delete column (first column) was clicked
     if col_idx == 0:  # Delete column
-        return delete_row_by_index(df, row_idx)
+        return delete_row_by_index(df, row_idx, session_state)
     else:
-        return df, ""  # No action for other columns
+        return df, "", session_state  # No action for other columns
+
+def store_session_record(session_state, filename, candidate_data, resume_text=None, job_hash=None):
+    """Add or replace a result row in the session, keeping analytics in sync"""
+    session_state["records"][filename] = candidate_data
+    if resume_text is not None:
+        session_state["texts"][filename] = resume_text
+    # API errors keep no job spec hash so they count as stale and are retried
+    if job_hash is not None and candidate_data.get("Result") != "Error":
+        session_state["scored_with"][filename] = job_hash
+    else:
+        session_state["scored_with"].pop(filename, None)
+    update_row_stats(session_state, filename, candidate_data)
+
+def remove_session_record(session_state, filename):
+    session_state["records"].pop(filename, None)
+    session_state["texts"].pop(filename, None)
+    session_state["scored_with"].pop(filename, None)
+    remove_row_stats(session_state, filename)
+
+def get_stale_filenames(session_state, job_hash):
+    return [filename for filename in session_state["records"]
+            if filename in session_state["texts"] and session_state["scored_with"].get(filename) != job_hash]
+
+def mark_stale_records(session_state, job_title, job_responsibilities):
+    """Flag rows scored against a different job spec; returns the stale filenames"""
+    session_state["job_spec"] = (job_title, job_responsibilities)
+    stale_files = get_stale_filenames(session_state, compute_job_spec_hash(job_title, job_responsibilities))
+    for filename in stale_files:
+        record = session_state["records"][filename]
+        record["Result"] = STALE_RESULT
+        record["Reason"] = STALE_REASON
+        update_row_stats(session_state, filename, record)
+    return stale_files
+
+def build_results_table(all_candidates):
+    """Build the display table from candidate records"""
+    df = pd.DataFrame(all_candidates)
+    
+    for col in COLUMN_ORDER:
+        if col not in df.columns:
+            df[col] = "Not Available"
+    
+    df_display = df[COLUMN_ORDER].copy()
+    
+    # Add color indicators and delete buttons
+    return add_color_indicators_and_delete_buttons(df_display)
 
-def analyze_multiple_resumes(resume_files, job_title, job_responsibilities, existing_data, is_initial_run=True):
-    if not CLAUDE_API_KEY:
+def export_results_csv(df_display):
+    """Write the display table to a timestamped CSV and return its filename"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    csv_filename = f"resume_analysis_{timestamp}.csv"
+    
+    # Create clean version for CSV (without delete column and emoji indicators)
+    df_for_csv = df_display.copy()
+    if 'Del' in df_for_csv.columns:
+        df_for_csv = df_for_csv.drop('Del', axis=1)
+    for idx, row in df_for_csv.iterrows():
+        filename = str(row['File'])
+        clean_filename = re.sub(r'^[🟢🟠🔴⚪] ', '', filename)
+        df_for_csv.at[idx, 'File'] = clean_filename
+    df_for_csv.to_csv(csv_filename, index=False)
+    
+    return csv_filename
+
+def analyze_multiple_resumes(resume_files, job_title, job_responsibilities, existing_data, session_state, is_initial_run=True):
+    if session_state is None:
+        session_state = new_session_state()
+    
+    if not LLM_AVAILABLE:
         error_df = pd.DataFrame({"Error": ["⚠️ API Key not configured. Please set CLAUDE_API_KEY environment variable."]})
-        return error_df, None, gr.update(visible=False), gr.update(visible=True), gr.update(visible=False), ""
+        return error_df, None, gr.update(visible=False), gr.update(visible=True), gr.update(visible=False), "", session_state
     
     if not resume_files or len(resume_files) == 0:
+        has_data = existing_data is not None and not existing_data.empty
+        if has_data and job_title.strip() and job_responsibilities.strip() and len(job_responsibilities) <= 1000:
+            # No new files, but flag rows scored against an older job spec so they get re-scored
+            with SESSION_LOCK:
+                if mark_stale_records(session_state, job_title, job_responsibilities):
+                    existing_data = build_results_table(list(session_state["records"].values()))
         return (existing_data if existing_data is not None else pd.DataFrame(), None, gr.update(visible=False), 
-                gr.update(visible=not bool(existing_data is not None and not existing_data.empty)), 
-                gr.update(visible=bool(existing_data is not None and not existing_data.empty)), "")
+                gr.update(visible=not has_data), gr.update(visible=has_data), "", session_state)
     
     if len(resume_files) > 10:
         return (pd.DataFrame({"Error": ["Maximum 10 resume files allowed"]}), None, gr.update(visible=False), 
-                gr.update(visible=True), gr.update(visible=False), "")
+                gr.update(visible=True), gr.update(visible=False), "", session_state)
     
     if not job_title.strip():
         return (pd.DataFrame({"Error": ["Please enter the job title"]}), None, gr.update(visible=False), 
-                gr.update(visible=True), gr.update(visible=False), "")
+                gr.update(visible=True), gr.update(visible=False), "", session_state)
         
     if not job_responsibilities.strip():
         return (pd.DataFrame({"Error": ["Please enter the roles and responsibilities"]}), None, gr.update(visible=False), 
-                gr.update(visible=True), gr.update(visible=False), "")
+                gr.update(visible=True), gr.update(visible=False), "", session_state)
     
     if len(job_responsibilities) > 1000:
         return (pd.DataFrame({"Error": [f"Roles and Responsibilities exceeds 1000 characters. Current: {len(job_responsibilities)} characters"]}), 
-                None, gr.update(visible=False), gr.update(visible=True), gr.update(visible=False), "")
+                None, gr.update(visible=False), gr.update(visible=True), gr.update(visible=False), "", session_state)
     
     try:
-        client = anthropic.Anthropic(api_key=CLAUDE_API_KEY)
+        client = create_client()
     except Exception as e:
         return (pd.DataFrame({"Error": [f"Error initializing Claude API: {str(e)}"]}), None, gr.update(visible=False), 
-                gr.update(visible=True), gr.update(visible=False), "")
+                gr.update(visible=True), gr.update(visible=False), "", session_state)
     
-    all_candidates = []
+    job_hash = compute_job_spec_hash(job_title, job_responsibilities)
     skipped_files = []
     
     # Handle existing data
-    if existing_data is not None and not existing_data.empty:
-        existing_clean = existing_data.copy()
-        # Remove delete column if it exists
-        if 'Del' in existing_clean.columns:
-            existing_clean = existing_clean.drop('Del', axis=1)
-        
-        processed_files = get_processed_filenames(existing_clean)
-        
-        if 'File' in existing_clean.columns:
-            for idx, row in existing_clean.iterrows():
-                filename = str(row['File'])
-                clean_filename = re.sub(r'^[🟢🟠🔴⚪] ', '', filename)
-                existing_clean.at[idx, 'File'] = clean_filename
-        
-        existing_records = existing_clean.to_dict('records')
-        for record in existing_records:
-            if '_original_data' in record:
-                del record['_original_data']
-        all_candidates.extend(existing_records)
-    else:
-        processed_files = set()
+    with SESSION_LOCK:
+        # Rows for files that couldn't be read (e.g. OCR ran out of time) are replaced when re-uploaded
+        unreadable_files = {filename for filename in session_state["records"] if filename not in session_state["texts"]}
+        processed_files = (set(session_state["records"]) | get_processed_filenames(existing_data)) - unreadable_files
+        # Rows scored against an older job spec are re-scored by rescore_stale_rows
+        mark_stale_records(session_state, job_title, job_responsibilities)
     
+    new_files = []
     for resume_file in resume_files:
         filename = os.path.basename(resume_file.name) if hasattr(resume_file, 'name') else "unknown_file"
         if filename in processed_files:
             skipped_files.append(filename)
             continue
-        resume_text = extract_text_from_file(resume_file)
-        if resume_text.startswith("Error") or resume_text.startswith("Unsupported"):
-            error_data = {
-                "Name": "File Error", "Email": "N/A", "Phone": "N/A", "Current Company": "N/A",
-                "Current Role": "N/A", "Experience": "N/A", "Job Desc Score": "N/A", "Designation Score": "N/A",
-                "Final Score": "N/A", "Result": "ERROR", "Reason": resume_text,
-                "File": filename, "_original_data": {
-                    "Current Company": "N/A", "Current Role": "N/A", "Reason": resume_text, "File": filename
+        new_files.append((filename, resume_file))
+        # Same filename twice in one batch would otherwise produce duplicate rows
+        processed_files.add(filename)
+    
+    with batch_slot():
+        # Extract every file at once so scanned files OCR in parallel against one batch-wide time budget
+        ocr_clock = new_ocr_clock()
+        with ThreadPoolExecutor(max_workers=max(len(new_files), 1)) as executor:
+            resume_texts = list(executor.map(lambda item: extract_text_from_file(item[1], ocr_clock), new_files))
+        
+        for (filename, _), resume_text in zip(new_files, resume_texts):
+            if resume_text.startswith("Error") or resume_text.startswith("Unsupported"):
+                error_data = {
+                    "Name": "File Error", "Email": "N/A", "Phone": "N/A", "Current Company": "N/A",
+                    "Current Role": "N/A", "Experience": "N/A", "Job Desc Score": "N/A", "Designation Score": "N/A",
+                    "Final Score": "N/A", "Result": "ERROR", "Reason": resume_text,
+                    "File": filename, "_original_data": {
+                        "Current Company": "N/A", "Current Role": "N/A", "Reason": resume_text, "File": filename
+                    }
                 }
-            }
-            all_candidates.append(error_data)
-        else:
-            candidate_data = analyze_single_resume(client, resume_text, job_title, job_responsibilities, filename)
-            all_candidates.append(candidate_data)
+                with SESSION_LOCK:
+                    store_session_record(session_state, filename, error_data)
+            else:
+                candidate_data = get_cached_analysis(client, resume_text, job_title, job_responsibilities, filename)
+                with SESSION_LOCK:
+                    store_session_record(session_state, filename, candidate_data, resume_text, job_hash)
+    
+    with SESSION_LOCK:
+        all_candidates = list(session_state["records"].values())
     
     if not all_candidates:
         return (pd.DataFrame({"Message": ["No candidates processed"]}), None, gr.update(visible=False), 
-                gr.update(visible=True), gr.update(visible=False), "")
+                gr.update(visible=True), gr.update(visible=False), "", session_state)
     
-    df = pd.DataFrame(all_candidates)
-    column_order = ["File", "Name", "Email", "Phone", "Current Company", "Current Role", "Experience", 
-                   "Job Desc Score", "Designation Score", "Final Score", "Result", "Reason"]
-    
-    for col in column_order:
-        if col not in df.columns:
-            df[col] = "Not Available"
-    
-    df_display = df[column_order].copy()
-    
-    # Add color indicators and delete buttons
-    df_display = add_color_indicators_and_delete_buttons(df_display)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    csv_filename = f"resume_analysis_{timestamp}.csv"
-    
-    # Create clean version for CSV (without delete column and emoji indicators)
-    df_for_csv = df_display.copy()
-    if 'Del' in df_for_csv.columns:
-        df_for_csv = df_for_csv.drop('Del', axis=1)
-    for idx, row in df_for_csv.iterrows():
-        filename = str(row['File'])
-        clean_filename = re.sub(r'^[🟢🟠🔴⚪] ', '', filename)
-        df_for_csv.at[idx, 'File'] = clean_filename
-    df_for_csv.to_csv(csv_filename, index=False)
+    df_display = build_results_table(all_candidates)
+    csv_filename = export_results_csv(df_display)
     
     upload_section_visible = is_initial_run and df_display.empty
     quick_section_visible = not df_display.empty
@@ -384,7 +1054,90 @@ def analyze_multiple_resumes(resume_files, job_title, job_responsibilities, exis
         status_msg = f"Skipped {len(skipped_files)} duplicate files: {', '.join(skipped_files)}"
     
     return (df_display, csv_filename, gr.update(visible=fullscreen_visible), 
-            gr.update(visible=upload_section_visible), gr.update(visible=quick_section_visible), status_msg)
+            gr.update(visible=upload_section_visible), gr.update(visible=quick_section_visible), status_msg, session_state)
+
+def rescore_rows(session_state, client, stale_texts, job_title, job_responsibilities):
+    """Score stale_texts against the job spec and merge the results into the session; returns the rows merged"""
+    job_hash = compute_job_spec_hash(job_title, job_responsibilities)
+    
+    def rescore(filename):
+        return filename, get_cached_analysis(client, stale_texts[filename], job_title, job_responsibilities, filename)
+    
+    with batch_slot(), ThreadPoolExecutor(max_workers=RESCORE_WORKERS) as executor:
+        rescored = list(executor.map(rescore, stale_texts))
+    
+    merged_count = 0
+    with SESSION_LOCK:
+        for filename, candidate_data in rescored:
+            # Skip rows deleted (or cleared) while re-scoring was running
+            if filename not in session_state["records"]:
+                continue
+            store_session_record(session_state, filename, candidate_data, job_hash=job_hash)
+            merged_count += 1
+    return merged_count
+
+def rescore_stale_rows(job_title, job_responsibilities, session_state, status_msg, request: gr.Request = None):
+    """Re-score rows whose job spec hash no longer matches, reusing the stored extracted text.
+
+    Results are merged into the session records by filename, so rows deleted or added
+    by other events while re-scoring is running are respected. Only one re-score runs per
+    session; it repeats against the session's latest job spec until no row is stale, so
+    later re-score events for the same session return straight away.
+    """
+    if (session_state is None or not LLM_AVAILABLE or not job_title.strip() or not job_responsibilities.strip()
+            or len(job_responsibilities) > 1000):
+        return gr.update(), gr.update(), status_msg
+    
+    with session_admission(request, "rescore") as admitted:
+        if not admitted:
+            return gr.update(), gr.update(), status_msg
+        
+        try:
+            client = create_client()
+        except Exception as e:
+            return gr.update(), gr.update(), f"Error initializing Claude API: {str(e)}"
+        
+        rescored_count = 0
+        # (filename, job hash) pairs already tried, so rows that fail again aren't retried forever
+        attempted = set()
+        while True:
+            with SESSION_LOCK:
+                job_title, job_responsibilities = session_state.get("job_spec") or (job_title, job_responsibilities)
+                job_hash = compute_job_spec_hash(job_title, job_responsibilities)
+                stale_texts = {filename: session_state["texts"][filename]
+                               for filename in get_stale_filenames(session_state, job_hash)
+                               if (filename, job_hash) not in attempted}
+            if not stale_texts:
+                break
+            attempted.update((filename, job_hash) for filename in stale_texts)
+            rescored_count += rescore_rows(session_state, client, stale_texts, job_title, job_responsibilities)
+        
+        if rescored_count == 0:
+            return gr.update(), gr.update(), status_msg
+        
+        with SESSION_LOCK:
+            all_candidates = list(session_state["records"].values())
+        df_display = build_results_table(all_candidates)
+        csv_filename = export_results_csv(df_display)
+        
+        rescore_msg = f"Re-scored {rescored_count} candidates against the current job description"
+        status_msg = f"{status_msg} | {rescore_msg}" if status_msg else rescore_msg
+        
+        return df_display, csv_filename, status_msg
+
+def analyze_for_session(resume_files, job_title, job_responsibilities, existing_data, session_state, is_initial_run, request):
+    """Run analyze_multiple_resumes unless this browser session already has an analysis in flight"""
+    with session_admission(request, "analysis") as admitted:
+        if not admitted:
+            busy_msg = "⏳ An analysis is already running for this session. Please wait for it to finish."
+            return gr.update(), gr.update(), gr.update(), gr.update(), gr.update(), busy_msg, session_state
+        return analyze_multiple_resumes(resume_files, job_title, job_responsibilities, existing_data, session_state, is_initial_run)
+
+def analyze_initial_resumes(resume_files, job_title, job_responsibilities, existing_data, session_state, request: gr.Request):
+    return analyze_for_session(resume_files, job_title, job_responsibilities, existing_data, session_state, True, request)
+
+def analyze_additional_resumes(resume_files, job_title, job_responsibilities, existing_data, session_state, request: gr.Request):
+    return analyze_for_session(resume_files, job_title, job_responsibilities, existing_data, session_state, False, request)
 
 def show_analyze_button(files):
     if files is not None and len(files) > 0:
@@ -401,11 +1154,19 @@ def update_char_count_and_button(text):
         char_display = f"✅ {char_count}/1000 characters"
     return char_display, gr.update(interactive=button_interactive), gr.update(interactive=button_interactive)
 
-def clear_all():
+def clear_all(session_state):
+    # Reset in place so a background re-score still holding this state sees the rows are gone
+    if session_state is None:
+        session_state = new_session_state()
+    with SESSION_LOCK:
+        session_state.clear()
+        session_state.update(new_session_state())
     return ([], [], "", "", pd.DataFrame(), None, "✅ 0/1000 characters", gr.update(interactive=True), 
-            gr.update(visible=False), gr.update(visible=True), gr.update(visible=False), "")
+            gr.update(visible=False), gr.update(visible=True), gr.update(visible=False), "", session_state)
 
 def show_api_status():
+    if LLM_CASSETTE_MODE == "replay":
+        return f"🟡 Replay Mode - Serving recorded responses from {LLM_CASSETTE_PATH}"
     if CLAUDE_API_KEY:
         return "🟢 API Key Configured"
     else:
@@ -631,6 +1392,7 @@ def create_interface():
         gr.Markdown("# 📋 Resume Analysis Tool - Advanced Scoring System")
         gr.Markdown("Upload resumes and define job requirements for structured analysis with detailed scoring")
         api_status = gr.Markdown(show_api_status(), elem_classes=["api-status"])
+        session_state = gr.State(new_session_state())
         
         with gr.Row():
             with gr.Column():
@@ -647,12 +1409,12 @@ def create_interface():
                 char_count = gr.Markdown("✅ 0/1000 characters")
                 
                 with gr.Row():
-                    analyze_bulk_btn = gr.Button("🔍 Analyze Multiple Resumes", variant="primary", interactive=bool(CLAUDE_API_KEY))
+                    analyze_bulk_btn = gr.Button("🔍 Analyze Multiple Resumes", variant="primary", interactive=LLM_AVAILABLE)
                 
                 with gr.Group(visible=False, elem_classes=["quick-analysis-section"]) as quick_analysis_section:
                     gr.Markdown("**⚡ Analyze More Resumes**")
                     additional_resume_input = gr.File(label="Upload More Resumes (Max 10)", file_types=[".pdf", ".docx", ".txt"], file_count="multiple")
-                    analyze_more_resumes_btn = gr.Button("Analyze", elem_classes=["analyze-more-btn"], visible=False, interactive=bool(CLAUDE_API_KEY))
+                    analyze_more_resumes_btn = gr.Button("Analyze", elem_classes=["analyze-more-btn"], visible=False, interactive=LLM_AVAILABLE)
                     gr.Markdown("*This section uses the same job requirements as above*")
                 
                 with gr.Row():
@@ -670,7 +1432,7 @@ def create_interface():
                 gr.Markdown("**Designation Match (35%):** Title similarity + Level alignment")
                 gr.Markdown("**Final Decision:** 8-10=Good Match | 5-7=Considerable | <5=Reject")
                 
-                if not CLAUDE_API_KEY:
+                if not LLM_AVAILABLE:
                     gr.Markdown("### ⚠️ Configuration Required:")
                     gr.Markdown("Please set CLAUDE_API_KEY environment variable in your deployment settings.")
             
@@ -684,6 +1446,9 @@ def create_interface():
                 status_message = gr.Markdown("", elem_classes=["status-message"], visible=False)
                 csv_download = gr.File(label="📁 Download Results as CSV", visible=False)
                 
+                gr.Markdown("### 📈 Candidate Analytics:")
+                analytics_panel = gr.Markdown(render_analytics(None, ""))
+                
                 gr.Markdown("### 📊 Export & Legend:")
                 gr.Markdown("**Columns:** Job Desc Score (X/6.5) + Designation Score (X/3.5) = Final Score (X/10)")
                 gr.Markdown("**Colors:** 🟢 Good Match (8-10) | 🟠 Considerable (5-7) | 🔴 Reject (<5)")
@@ -697,22 +1462,36 @@ def create_interface():
                 close_fullscreen_btn = gr.Button("✕ Close", elem_classes=["close-fullscreen-btn"])
             fullscreen_dataframe = gr.Dataframe(interactive=False, wrap=False)
         
-        if CLAUDE_API_KEY:
+        if LLM_AVAILABLE:
             additional_resume_input.change(fn=show_analyze_button, inputs=[additional_resume_input], outputs=[analyze_more_resumes_btn])
             job_responsibilities_input.change(fn=update_char_count_and_button, inputs=[job_responsibilities_input], 
                                             outputs=[char_count, analyze_bulk_btn, analyze_more_resumes_btn])
             
-            analyze_bulk_btn.click(fn=lambda files, title, resp, data: analyze_multiple_resumes(files, title, resp, data, True),
-                                 inputs=[resume_files_input, job_title_input, job_responsibilities_input, results_output],
-                                 outputs=[results_output, csv_download, fullscreen_btn, initial_upload_section, quick_analysis_section, status_message]
+            analyze_bulk_btn.click(fn=analyze_initial_resumes,
+                                 inputs=[resume_files_input, job_title_input, job_responsibilities_input, results_output, session_state],
+                                 outputs=[results_output, csv_download, fullscreen_btn, initial_upload_section, quick_analysis_section, status_message, session_state],
+                                 api_name="analyze", concurrency_limit=ANALYSIS_CONCURRENCY_LIMIT, concurrency_id="analysis"
+                                ).then(fn=render_analytics, inputs=[session_state, job_title_input], outputs=[analytics_panel]
+                                ).then(fn=rescore_stale_rows,
+                                      inputs=[job_title_input, job_responsibilities_input, session_state, status_message],
+                                      outputs=[results_output, csv_download, status_message],
+                                      concurrency_limit=ANALYSIS_CONCURRENCY_LIMIT, concurrency_id="analysis"
+                                ).then(fn=render_analytics, inputs=[session_state, job_title_input], outputs=[analytics_panel]
                                 ).then(fn=lambda csv_file: gr.update(visible=True) if csv_file else gr.update(visible=False),
                                       inputs=[csv_download], outputs=[csv_download]
                                 ).then(fn=lambda msg: gr.update(value=msg, visible=bool(msg)) if msg else gr.update(visible=False),
                                       inputs=[status_message], outputs=[status_message])
             
-            analyze_more_resumes_btn.click(fn=lambda files, title, resp, data: analyze_multiple_resumes(files, title, resp, data, False),
-                                         inputs=[additional_resume_input, job_title_input, job_responsibilities_input, results_output],
-                                         outputs=[results_output, csv_download, fullscreen_btn, initial_upload_section, quick_analysis_section, status_message]
+            analyze_more_resumes_btn.click(fn=analyze_additional_resumes,
+                                         inputs=[additional_resume_input, job_title_input, job_responsibilities_input, results_output, session_state],
+                                         outputs=[results_output, csv_download, fullscreen_btn, initial_upload_section, quick_analysis_section, status_message, session_state],
+                                         api_name="analyze_more", concurrency_limit=ANALYSIS_CONCURRENCY_LIMIT, concurrency_id="analysis"
+                                        ).then(fn=render_analytics, inputs=[session_state, job_title_input], outputs=[analytics_panel]
+                                        ).then(fn=rescore_stale_rows,
+                                              inputs=[job_title_input, job_responsibilities_input, session_state, status_message],
+                                              outputs=[results_output, csv_download, status_message],
+                                              concurrency_limit=ANALYSIS_CONCURRENCY_LIMIT, concurrency_id="analysis"
+                                        ).then(fn=render_analytics, inputs=[session_state, job_title_input], outputs=[analytics_panel]
                                         ).then(fn=lambda csv_file: gr.update(visible=True) if csv_file else gr.update(visible=False),
                                               inputs=[csv_download], outputs=[csv_download]
                                         ).then(fn=lambda msg: gr.update(value=msg, visible=bool(msg)) if msg else gr.update(visible=False),
@@ -722,29 +1501,89 @@ def create_interface():
             close_fullscreen_btn.click(fn=hide_fullscreen_table, outputs=[fullscreen_modal])
             
             # Handle cell selection for delete functionality
-            results_output.select(fn=handle_dataframe_select, inputs=[results_output], outputs=[results_output, status_message]
+            results_output.select(fn=handle_dataframe_select, inputs=[results_output, session_state], 
+                                 outputs=[results_output, status_message, session_state]
+                                ).then(fn=render_analytics, inputs=[session_state, job_title_input], outputs=[analytics_panel]
                                 ).then(fn=lambda msg: gr.update(value=msg, visible=bool(msg)) if msg else gr.update(visible=False),
                                       inputs=[status_message], outputs=[status_message])
         
-        clear_btn.click(fn=clear_all, 
+        clear_btn.click(fn=clear_all, inputs=[session_state],
                        outputs=[resume_files_input, additional_resume_input, job_title_input, job_responsibilities_input, 
                                results_output, csv_download, char_count, analyze_bulk_btn, analyze_more_resumes_btn, 
-                               fullscreen_btn, initial_upload_section, quick_analysis_section, status_message])
+                               fullscreen_btn, initial_upload_section, quick_analysis_section, status_message, session_state]
+                       ).then(fn=render_analytics, inputs=[session_state, job_title_input], outputs=[analytics_panel])
     
     return interface
 
+def configure_queue(interface):
+    """Configure the Gradio queue so long analysis batches don't hold up lightweight UI events"""
+    return interface.queue(default_concurrency_limit=UI_CONCURRENCY_LIMIT, max_size=QUEUE_MAX_SIZE)
+
+def run_workers(port):
+    """Serve $PORT with WEB_CONCURRENCY Gradio worker processes behind a session-affinity proxy.
+
+    Gradio's queue keeps each event's state in the process that accepted it, so the
+    parent process owns the public port and pins every session to one worker
+    (see worker_proxy.py). Workers listen on localhost at WORKER_BASE_PORT, +1, ...
+    and are restarted if they exit.
+    """
+    import uvicorn
+    from worker_proxy import create_proxy_app
+    
+    # Workers share caches, rate limiter and batch slots through SQLite
+    env = dict(os.environ, WEB_CONCURRENCY="1", SERVER_NAME="127.0.0.1")
+    env.setdefault("SHARED_STATE_DB", os.path.join(tempfile.gettempdir(), "resume_analyzer_state.db"))
+    base_port = int(os.getenv("WORKER_BASE_PORT", port + 1))
+    worker_ports = [base_port + worker_index for worker_index in range(WEB_CONCURRENCY)]
+    
+    def start_worker(worker_port):
+        return subprocess.Popen([sys.executable, os.path.abspath(__file__)], env=dict(env, PORT=str(worker_port)))
+    
+    workers = {worker_port: start_worker(worker_port) for worker_port in worker_ports}
+    stopping = threading.Event()
+    
+    def supervise():
+        while not stopping.wait(5):
+            for worker_port, worker in workers.items():
+                if worker.poll() is not None:
+                    print(f"⚠️ Worker on port {worker_port} exited with code {worker.returncode}, restarting")
+                    workers[worker_port] = start_worker(worker_port)
+    
+    supervisor = threading.Thread(target=supervise, daemon=True)
+    supervisor.start()
+    print(f"👥 Serving port {port} with {WEB_CONCURRENCY} workers on ports {worker_ports[0]}-{worker_ports[-1]}, "
+          f"shared state: {env['SHARED_STATE_DB']}")
+    
+    try:
+        # workers=1: uvicorn would otherwise read WEB_CONCURRENCY as its own worker count
+        uvicorn.run(create_proxy_app(worker_ports), host="0.0.0.0", port=port, workers=1, log_level="warning")
+    finally:
+        # Stop restarting workers before terminating them
+        stopping.set()
+        supervisor.join()
+        for worker in workers.values():
+            worker.terminate()
+        for worker in workers.values():
+            worker.wait()
+
 # At the bottom, modify the launch section:
 if __name__ == "__main__":
     print("🚀 Starting Resume Analysis Tool...")
     print("📊 API Status:", "✅ Configured" if CLAUDE_API_KEY else "❌ Not Configured")
-    interface = create_interface()
+    if LLM_CASSETTE_MODE != "off":
+        print(f"📼 LLM cassette mode: {LLM_CASSETTE_MODE} ({LLM_CASSETTE_PATH})")
     
     # Get port from environment variable (Render provides this)
     port = int(os.getenv("PORT", 7860))
     
-    interface.launch(
-        server_name="0.0.0.0",
-        server_port=port,
-        share=False,  # Set to False for production
-        debug=False   # Set to False for production
-    )
+    if WEB_CONCURRENCY > 1:
+        run_workers(port)
+    else:
+        warm_ocr_pool()
+        interface = configure_queue(create_interface())
+        interface.launch(
+            server_name=os.getenv("SERVER_NAME", "0.0.0.0"),
+            server_port=port,
+            share=False,  # Set to False for production
+            debug=False   # Set to False for production
+        )
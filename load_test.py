@@ -0,0 +1,102 @@
+"""Load test for a running Resume Analysis Tool server.
+
+Simulates N concurrent users, each in its own Gradio session, submitting resume
+batches to the /analyze endpoint and reports how throughput scales with N.
+Pass several comma separated URLs to spread users across servers round-robin.
+
+Each batch runs in a fresh session with a job description tagged by user and
+batch, so every file is scored instead of being answered from the shared result
+cache. To measure the serving layer without spending API credits, start the
+server with LLM_CASSETTE_MODE=replay and RESULT_CACHE_MAX_ENTRIES=0 and pass
+--same-job-description so every batch matches the recorded responses.
+
+Example:
+    python load_test.py --url http://localhost:7860/ --users 1,2,4,8 --files resumes/*.pdf
+"""
+import argparse
+import glob
+import statistics
+import threading
+import time
+import uuid
+
+from gradio_client import Client, handle_file
+
+def run_user(url, user, files, job_title, job_responsibilities, batches, tag_batches, latencies, errors, lock):
+    try:
+        client = Client(url, verbose=False)
+    except Exception as e:
+        with lock:
+            errors.append(f"connect: {str(e)}")
+        return
+
+    run_id = uuid.uuid4().hex[:8]
+    for batch in range(batches):
+        client.reset_session()
+        batch_responsibilities = job_responsibilities
+        if tag_batches:
+            batch_responsibilities += f" (load test {run_id}, user {user}, batch {batch})"
+        start = time.perf_counter()
+        try:
+            client.predict([handle_file(path) for path in files], job_title, batch_responsibilities,
+                           {"headers": [], "data": [], "metadata": None}, api_name="/analyze")
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+            continue
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+def run_load_level(urls, users, files, job_title, job_responsibilities, batches, tag_batches):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    threads = [threading.Thread(target=run_user, args=(urls[user % len(urls)], user, files, job_title, job_responsibilities,
+                                                       batches, tag_batches, latencies, errors, lock))
+               for user in range(users)]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    completed = len(latencies)
+    return {
+        "users": users,
+        "batches": completed,
+        "errors": len(errors),
+        "elapsed": elapsed,
+        "batches_per_min": completed / elapsed * 60 if elapsed else 0,
+        "files_per_sec": completed * len(files) / elapsed if elapsed else 0,
+        "p50": statistics.median(latencies) if latencies else 0,
+        "p95": sorted(latencies)[min(completed - 1, int(0.95 * completed))] if latencies else 0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Resume Analysis Tool with simulated users")
+    parser.add_argument("--url", default="http://localhost:7860/", help="Comma separated server or worker URLs")
+    parser.add_argument("--users", default="1,2,4,8", help="Comma separated simulated user counts")
+    parser.add_argument("--batches", type=int, default=2, help="Batches submitted by each user")
+    parser.add_argument("--files", nargs="+", required=True, help="Resume files uploaded in each batch (max 10)")
+    parser.add_argument("--job-title", default="Senior Sales Manager")
+    parser.add_argument("--job-responsibilities", default="Lead the regional sales team, own revenue targets "
+                                                          "and manage key enterprise accounts.")
+    parser.add_argument("--same-job-description", action="store_true",
+                        help="Send the job description unchanged, e.g. against a replay server with the cache disabled")
+    args = parser.parse_args()
+
+    files = [path for pattern in args.files for path in glob.glob(pattern)][:10]
+    if not files:
+        parser.error("No resume files matched --files")
+
+    print(f"{'Users':>6} {'Batches':>8} {'Errors':>7} {'Batches/min':>12} {'Files/sec':>10} {'p50 (s)':>8} {'p95 (s)':>8}")
+    for users in [int(n) for n in args.users.split(",")]:
+        result = run_load_level(args.url.split(","), users, files, args.job_title, args.job_responsibilities, args.batches,
+                                not args.same_job_description)
+        print(f"{result['users']:>6} {result['batches']:>8} {result['errors']:>7} {result['batches_per_min']:>12.1f} "
+              f"{result['files_per_sec']:>10.2f} {result['p50']:>8.2f} {result['p95']:>8.2f}")
+
+if __name__ == "__main__":
+    main()
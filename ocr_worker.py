@@ -0,0 +1,43 @@
+"""Page-level OCR for image-only PDF pages.
+
+Kept apart from app.py so it only depends on the optional pytesseract and
+pdf2image packages. Rendering (pdftoppm) and OCR (tesseract) run as child
+processes with timeouts derived from the file's deadline, so a stuck page is
+killed when the budget runs out instead of holding a worker.
+"""
+import tempfile
+import time
+
+import pytesseract
+from pdf2image import convert_from_bytes
+from pdf2image.exceptions import PDFPopplerTimeoutError
+
+def check_ocr_engine():
+    """Raise if the tesseract binary is not installed"""
+    return pytesseract.get_tesseract_version()
+
+def ocr_pdf_page(pdf_bytes, page_index, dpi, deadline):
+    """Render one page and OCR it; returns None if the deadline (time.monotonic) passes first"""
+    with tempfile.TemporaryDirectory() as output_folder:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        try:
+            # Render straight to a file so the image is never decoded in this process
+            paths = convert_from_bytes(pdf_bytes, dpi=dpi, first_page=page_index + 1, last_page=page_index + 1,
+                                       output_folder=output_folder, paths_only=True, timeout=remaining)
+        except PDFPopplerTimeoutError:
+            return None
+        if not paths:
+            return ""
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        try:
+            return pytesseract.image_to_string(paths[0], timeout=remaining)
+        except RuntimeError as e:
+            # pytesseract kills tesseract and raises a plain RuntimeError on timeout
+            if "timeout" in str(e).lower():
+                return None
+            raise
@@ -0,0 +1,81 @@
+"""Offline benchmark of the full analyze_multiple_resumes pipeline.
+
+Runs text extraction, prompt building, regex parsing, table building and CSV
+export against Claude responses recorded in the cassette file, so no API calls
+are made. Record the cassettes once with a real API key, then replay them:
+
+    python replay_benchmark.py --mode record --files resumes/*.pdf
+    python replay_benchmark.py --files resumes/*.pdf --iterations 20 --latency 800 --profile
+"""
+import argparse
+import cProfile
+import glob
+import os
+import pstats
+import statistics
+import sys
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark resume analysis offline using recorded Claude responses")
+    parser.add_argument("--mode", choices=["replay", "record"], default="replay")
+    parser.add_argument("--files", nargs="+", required=True, help="Resume files analyzed in each batch (max 10)")
+    parser.add_argument("--cassettes", default="llm_cassettes.jsonl", help="Cassette file to record to or replay from")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--latency", default="0", help='Simulated API latency in ms, or "recorded"')
+    parser.add_argument("--profile", action="store_true", help="Print the top functions by cumulative time")
+    parser.add_argument("--job-title", default="Senior Sales Manager")
+    parser.add_argument("--job-responsibilities", default="Lead the regional sales team, own revenue targets "
+                                                          "and manage key enterprise accounts.")
+    args = parser.parse_args()
+
+    # Configure the cassette layer before app reads its settings at import time
+    os.environ["LLM_CASSETTE_MODE"] = args.mode
+    os.environ["LLM_CASSETTE_PATH"] = args.cassettes
+    os.environ["LLM_REPLAY_LATENCY"] = args.latency
+    import app
+
+    # Every iteration should exercise the full pipeline rather than the result cache
+    app.RESULT_CACHE_MAX_ENTRIES = 0
+
+    paths = [path for pattern in args.files for path in glob.glob(pattern)][:10]
+    if not paths:
+        parser.error("No resume files matched --files")
+
+    iterations = 1 if args.mode == "record" else args.iterations
+    profiler = cProfile.Profile() if args.profile else None
+    timings = []
+    errors = 0
+
+    for _ in range(iterations):
+        files = [open(path, 'rb') for path in paths]
+        try:
+            start = time.perf_counter()
+            if profiler:
+                profiler.enable()
+            result = app.analyze_multiple_resumes(files, args.job_title, args.job_responsibilities, None,
+                                                  app.new_session_state(), True)
+            if profiler:
+                profiler.disable()
+            timings.append(time.perf_counter() - start)
+        finally:
+            for f in files:
+                f.close()
+
+        df = result[0]
+        if 'Result' in df.columns:
+            errors += int(df['Result'].astype(str).str.upper().eq('ERROR').sum())
+        if result[1] and os.path.exists(result[1]):
+            os.remove(result[1])
+
+    print(f"Mode: {args.mode} | Files per batch: {len(paths)} | Iterations: {iterations} | Error rows: {errors}")
+    print(f"Batch time: mean {statistics.mean(timings):.3f}s | min {min(timings):.3f}s | max {max(timings):.3f}s")
+    print(f"Throughput: {len(paths) * len(timings) / sum(timings):.1f} files/sec")
+    if args.mode == "replay":
+        print(app.cassette_drift_report())
+
+    if profiler:
+        pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(20)
+
+if __name__ == "__main__":
+    main()
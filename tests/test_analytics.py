@@ -0,0 +1,74 @@
+"""Tests for the incremental analytics aggregates behind the analytics panel."""
+import os
+import random
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app  # noqa: E402
+
+def candidate(company, score, result="GOOD MATCH"):
+    return {"Result": result, "Final Score": f"{score}/10", "Experience": "5 years", "Current Company": company}
+
+def check_buckets(analytics, expected_counts):
+    assert analytics["companies"] == dict(expected_counts)
+    # Walking the links from the highest bucket visits every company once, in descending count order
+    walked = get_all_companies(analytics)
+    assert sorted(walked) == sorted(expected_counts.items())
+    assert [count for _, count in walked] == sorted(expected_counts.values(), reverse=True)
+
+def get_all_companies(analytics):
+    return app.get_top_companies(analytics, len(analytics["companies"]) + 1)
+
+def test_top_companies_follow_adds_and_removals():
+    session_state = app.new_session_state()
+    for n, company in enumerate(["Acme", "Globex", "Acme", "Initech", "Acme", "Globex"]):
+        app.update_row_stats(session_state, f"resume_{n}.pdf", candidate(company, 8))
+    analytics = session_state["analytics"]
+
+    assert app.get_top_companies(analytics, 2) == [("Acme", 3), ("Globex", 2)]
+
+    app.remove_row_stats(session_state, "resume_0.pdf")
+    app.remove_row_stats(session_state, "resume_2.pdf")
+    # Ties keep the order in which companies reached that count
+    assert app.get_top_companies(analytics, 5) == [("Globex", 2), ("Initech", 1), ("Acme", 1)]
+
+    # Replacing a row moves its company contribution
+    app.update_row_stats(session_state, "resume_4.pdf", candidate("Initech", 8))
+    assert app.get_top_companies(analytics, 5) == [("Globex", 2), ("Initech", 2)]
+
+def test_top_companies_match_a_full_count_under_random_updates():
+    rng = random.Random(7)
+    session_state = app.new_session_state()
+    rows = {}
+    for step in range(2000):
+        filename = f"resume_{rng.randrange(60)}.pdf"
+        if filename in rows and rng.random() < 0.4:
+            app.remove_row_stats(session_state, filename)
+            del rows[filename]
+        else:
+            company = rng.choice(["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Vandelay", "Not Available"])
+            app.update_row_stats(session_state, filename, candidate(company, rng.randrange(11)))
+            rows[filename] = company
+        if step % 100 == 0:
+            check_buckets(session_state["analytics"], Counter(c for c in rows.values() if c != "Not Available"))
+
+    for filename in list(rows):
+        app.remove_row_stats(session_state, filename)
+    analytics = session_state["analytics"]
+    assert analytics["companies"] == {} and analytics["company_buckets"] == {}
+    assert analytics["highest_company_count"] is None and analytics["lowest_company_count"] is None
+
+def test_score_bars_are_scaled_to_a_fixed_width():
+    session_state = app.new_session_state()
+    for n in range(300):
+        app.update_row_stats(session_state, f"resume_{n}.pdf", candidate("Acme", 9 if n < 290 else 3))
+
+    panel = app.render_analytics(session_state, "Sales Manager")
+    bars = {line.split(" | ")[0].strip(): line.split(" | ")[1] for line in panel.split("\n") if " | " in line
+            and line.split(" | ")[0].strip().isdigit()}
+
+    assert bars["9"] == "█" * app.ANALYTICS_BAR_WIDTH + " 290"
+    # Small non-empty bins still show a bar
+    assert bars["3"] == "█ 10"
+    assert bars["5"] == " 0"
@@ -0,0 +1,163 @@
+"""Pipeline tests that replay recorded Claude responses from tests/fixtures/cassettes.jsonl.
+
+The cassette holds responses for the three fixture resumes against two job
+descriptions (SALES_JOB and ENGINEERING_JOB), so no API key is needed.
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+RESUMES = ["alice_johnson.txt", "bob_smith.txt", "carol_lee.txt"]
+
+SALES_JOB = ("Regional Sales Manager",
+             "Lead the regional sales team, own revenue targets and manage key enterprise accounts.")
+ENGINEERING_JOB = ("Engineering Manager",
+                   "Lead a team of backend engineers, own delivery of the payments platform and mentor engineers.")
+
+@pytest.fixture(autouse=True)
+def replay_cassettes(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "LLM_CASSETTE_MODE", "replay")
+    monkeypatch.setattr(app, "LLM_CASSETTE_PATH", os.path.join(FIXTURES, "cassettes.jsonl"))
+    monkeypatch.setattr(app, "LLM_REPLAY_LATENCY", "0")
+    monkeypatch.setattr(app, "LLM_AVAILABLE", True)
+    monkeypatch.setattr(app, "CASSETTES", None)
+    monkeypatch.setattr(app, "CASSETTE_DRIFT", {})
+    # Every analysis should come from the cassette rather than the result cache
+    monkeypatch.setattr(app, "SHARED_STATE_DB", None)
+    monkeypatch.setattr(app, "RESULT_CACHE_MAX_ENTRIES", 0)
+    # Exported CSVs are written to the working directory
+    monkeypatch.chdir(tmp_path)
+
+@pytest.fixture
+def requested_keys(monkeypatch):
+    """Cassette keys requested from Claude, in call order"""
+    keys = []
+    create_message = app.create_message
+
+    def recording_create_message(client, cassette_key, **request):
+        keys.append(cassette_key)
+        return create_message(client, cassette_key, **request)
+
+    monkeypatch.setattr(app, "create_message", recording_create_message)
+    return keys
+
+def analyze(filenames, job, existing_data, session_state, is_initial_run=True):
+    files = [open(os.path.join(FIXTURES, "resumes", filename), 'rb') for filename in filenames]
+    try:
+        return app.analyze_multiple_resumes(files, *job, existing_data, session_state, is_initial_run)
+    finally:
+        for f in files:
+            f.close()
+
+def resume_key(filename, job):
+    with open(os.path.join(FIXTURES, "resumes", filename), encoding='utf-8') as f:
+        return app.get_analysis_cache_key(f.read(), *job)
+
+def test_replayed_responses_are_parsed_into_records():
+    session_state = app.new_session_state()
+    df, csv_filename, *_ = analyze(RESUMES, SALES_JOB, None, session_state)
+
+    alice = session_state["records"]["alice_johnson.txt"]
+    assert alice["Name"] == "Alice Johnson"
+    assert alice["Email"] == "alice.johnson@example.com"
+    assert alice["Phone"] == "+1 555 0101"
+    assert alice["Current Company"] == "Acme Corp"
+    assert alice["Current Role"] == "Regional Sales Manager"
+    assert alice["Experience"] == "8 years"
+    assert alice["Final Score"] == "9.0/10"
+    assert alice["Result"] == "GOOD MATCH"
+
+    assert list(df["File"]) == ["🟢 alice_johnson.txt", "🟠 bob_smith.txt", "🔴 carol_lee.txt"]
+    assert os.path.exists(csv_filename)
+    assert app.CASSETTE_DRIFT == {}
+
+def test_analytics_counts_follow_deleted_rows():
+    session_state = app.new_session_state()
+    df = analyze(RESUMES, SALES_JOB, None, session_state)[0]
+    analytics = session_state["analytics"]
+    assert analytics["results"] == {"GOOD MATCH": 1, "CONSIDERABLE MATCH": 1, "REJECT": 1, "OTHER": 0}
+    assert analytics["score_count"] == 3
+
+    df, message, session_state = app.delete_row_by_index(df, 0, session_state)
+
+    assert message == "Successfully deleted candidate: alice_johnson.txt"
+    assert list(df["File"]) == ["🟠 bob_smith.txt", "🔴 carol_lee.txt"]
+    assert analytics["results"] == {"GOOD MATCH": 0, "CONSIDERABLE MATCH": 1, "REJECT": 1, "OTHER": 0}
+    assert analytics["score_count"] == 2
+    assert analytics["score_sum"] == pytest.approx(7.0)
+    assert "Acme Corp" not in analytics["companies"]
+    assert "**Candidates:** 2" in app.render_analytics(session_state, SALES_JOB[0])
+
+def test_rescore_only_requests_stale_rows(requested_keys):
+    session_state = app.new_session_state()
+    df = analyze(RESUMES[:2], SALES_JOB, None, session_state)[0]
+
+    # Adding a resume after the job description changed scores the new file against
+    # the new description and flags the existing rows as stale
+    df, _, _, _, _, status_msg, session_state = analyze(RESUMES[2:], ENGINEERING_JOB, df, session_state,
+                                                         is_initial_run=False)
+    records = session_state["records"]
+    assert records["alice_johnson.txt"]["Result"] == app.STALE_RESULT
+    assert records["bob_smith.txt"]["Result"] == app.STALE_RESULT
+    assert records["carol_lee.txt"]["Result"] == "CONSIDERABLE MATCH"
+    assert session_state["analytics"]["results"]["OTHER"] == 2
+
+    requested_keys.clear()
+    _, _, status_msg = app.rescore_stale_rows(*ENGINEERING_JOB, session_state, status_msg)
+
+    assert sorted(requested_keys) == sorted(resume_key(filename, ENGINEERING_JOB) for filename in RESUMES[:2])
+    assert records["alice_johnson.txt"]["Final Score"] == "2.0/10"
+    assert records["bob_smith.txt"]["Final Score"] == "1.0/10"
+    assert records["carol_lee.txt"]["Final Score"] == "7.0/10"
+    assert session_state["analytics"]["results"] == {"GOOD MATCH": 0, "CONSIDERABLE MATCH": 1, "REJECT": 2, "OTHER": 0}
+    assert status_msg == "Re-scored 2 candidates against the current job description"
+
+    # Nothing is stale any more, so a second pass makes no calls
+    requested_keys.clear()
+    app.rescore_stale_rows(*ENGINEERING_JOB, session_state, status_msg)
+    assert requested_keys == []
+
+def test_rescore_follows_job_spec_changed_while_running(requested_keys, monkeypatch):
+    session_state = app.new_session_state()
+    df = analyze(RESUMES, SALES_JOB, None, session_state)[0]
+    # Analyze with no new files marks the rows stale against the engineering job
+    analyze([], ENGINEERING_JOB, df, session_state)
+
+    create_message = app.create_message
+
+    def switch_back_to_sales(client, cassette_key, **request):
+        # The user goes back to the sales job while the first pass is running
+        if len(requested_keys) == 1:
+            with app.SESSION_LOCK:
+                app.mark_stale_records(session_state, *SALES_JOB)
+        return create_message(client, cassette_key, **request)
+
+    monkeypatch.setattr(app, "create_message", switch_back_to_sales)
+    requested_keys.clear()
+    _, _, status_msg = app.rescore_stale_rows(*ENGINEERING_JOB, session_state, "")
+
+    assert sorted(requested_keys) == sorted([resume_key(filename, ENGINEERING_JOB) for filename in RESUMES] +
+                                            [resume_key(filename, SALES_JOB) for filename in RESUMES])
+    assert session_state["records"]["alice_johnson.txt"]["Final Score"] == "9.0/10"
+    assert session_state["analytics"]["results"] == {"GOOD MATCH": 1, "CONSIDERABLE MATCH": 1, "REJECT": 1, "OTHER": 0}
+    assert status_msg == "Re-scored 6 candidates against the current job description"
+
+def test_rescore_returns_while_session_already_rescoring(requested_keys):
+    session_state = app.new_session_state()
+    df = analyze(RESUMES, SALES_JOB, None, session_state)[0]
+    analyze([], ENGINEERING_JOB, df, session_state)
+    request = SimpleNamespace(session_hash="session-1")
+
+    requested_keys.clear()
+    with app.session_admission(request, "rescore"):
+        result = app.rescore_stale_rows(*ENGINEERING_JOB, session_state, "status", request)
+
+    assert result[2] == "status"
+    assert requested_keys == []
+    assert session_state["analytics"]["results"]["OTHER"] == 3
@@ -0,0 +1,178 @@
+"""Tests for the OCR fallback, with ocr_worker.ocr_pdf_page replaced by a fake page OCR."""
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app  # noqa: E402
+
+def make_pdf(page_texts):
+    """Build a PDF with one page per entry; None gives a page without a text layer, like a scan"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for text in page_texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET" if text else ""
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n".encode('latin-1')
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return pdf
+
+def write_pdf(directory, filename, page_texts):
+    path = directory / filename
+    path.write_bytes(make_pdf(page_texts))
+    return path
+
+@pytest.fixture
+def ocr_pages(monkeypatch):
+    """Replace the page OCR; tests set `ocr_pages.handler(pdf_bytes, page_index, deadline)`"""
+    calls = SimpleNamespace(pages=[], handler=lambda pdf_bytes, page_index, deadline: f"OCR text of page {page_index + 1}")
+
+    def ocr_pdf_page(pdf_bytes, page_index, dpi, deadline):
+        calls.pages.append(page_index)
+        return calls.handler(pdf_bytes, page_index, deadline)
+
+    monkeypatch.setattr(app, "ocr_worker", SimpleNamespace(ocr_pdf_page=ocr_pdf_page), raising=False)
+    monkeypatch.setattr(app, "OCR_AVAILABLE", True)
+    monkeypatch.setattr(app, "OCR_TIME_BUDGET_SECONDS", 0.5)
+    monkeypatch.setattr(app, "OCR_GRACE_SECONDS", 0.2)
+    monkeypatch.setattr(app, "OCR_WORKERS", 2)
+    monkeypatch.setattr(app, "OCR_EXECUTOR", None)
+    monkeypatch.setattr(app, "SHARED_STATE_DB", None)
+    monkeypatch.setattr(app, "LOCAL_CACHES", {"results": app.OrderedDict(), "ocr": app.OrderedDict()})
+    yield calls
+    if app.OCR_EXECUTOR is not None:
+        app.OCR_EXECUTOR.shutdown(wait=True)
+
+def hang_until_deadline(pdf_bytes, page_index, deadline):
+    # Like a stuck tesseract process that is killed when the budget runs out
+    time.sleep(max(deadline - time.monotonic(), 0))
+    return None
+
+def test_time_queued_behind_other_uploads_does_not_count(ocr_pages, monkeypatch):
+    monkeypatch.setattr(app, "OCR_WORKERS", 1)
+    release = threading.Event()
+    # Another user's scan holds the only OCR worker for longer than the budget
+    app.get_ocr_executor().submit(release.wait)
+    threading.Timer(0.8, release.set).start()
+
+    page_texts, complete = app.ocr_pdf_pages(make_pdf([None]), [0])
+
+    assert complete
+    assert page_texts == {0: "OCR text of page 1"}
+
+def test_batch_shares_one_ocr_budget(ocr_pages, monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "LLM_CASSETTE_MODE", "replay")
+    monkeypatch.setattr(app, "LLM_AVAILABLE", True)
+    monkeypatch.chdir(tmp_path)
+    ocr_pages.handler = hang_until_deadline
+    paths = [write_pdf(tmp_path, f"scan_{n}.pdf", [None]) for n in range(3)]
+
+    files = [open(path, 'rb') for path in paths]
+    start = time.monotonic()
+    try:
+        df = app.analyze_multiple_resumes(files, "Sales Manager", "Lead the sales team.", None,
+                                          app.new_session_state())[0]
+    finally:
+        for f in files:
+            f.close()
+    elapsed = time.monotonic() - start
+
+    # Three stuck files would take three budgets if they were OCR'd one after another
+    assert elapsed < 2 * app.OCR_TIME_BUDGET_SECONDS
+    assert sorted(ocr_pages.pages) == [0, 0, 0]
+    assert list(df["Result"]) == ["ERROR"] * 3
+    assert all("time budget" in reason for reason in df["Reason"])
+
+def test_reuploading_a_timed_out_file_retries_it(ocr_pages, monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "LLM_CASSETTE_MODE", "replay")
+    monkeypatch.setattr(app, "LLM_AVAILABLE", True)
+    monkeypatch.setattr(app, "RESULT_CACHE_MAX_ENTRIES", 0)
+    monkeypatch.setattr(app, "create_message", lambda client, cassette_key, **request: SimpleNamespace(content=[
+        SimpleNamespace(text="CANDIDATE_NAME: Dana Scan\nFINAL_SCORE: 8/10\nRECOMMENDATION: GOOD MATCH\nREASON: r")]))
+    monkeypatch.chdir(tmp_path)
+    path = write_pdf(tmp_path, "scan.pdf", [None])
+    session_state = app.new_session_state()
+
+    ocr_pages.handler = hang_until_deadline
+    with open(path, 'rb') as f:
+        df = app.analyze_multiple_resumes([f], "Sales Manager", "Lead the sales team.", None, session_state)[0]
+    assert list(df["Result"]) == ["ERROR"]
+
+    ocr_pages.handler = lambda pdf_bytes, page_index, deadline: "Dana Scan, sales manager for ten years"
+    with open(path, 'rb') as f:
+        result = app.analyze_multiple_resumes([f], "Sales Manager", "Lead the sales team.", df, session_state, False)
+
+    df, status_msg = result[0], result[5]
+    assert status_msg == ""
+    assert list(df["Name"]) == ["Dana Scan"]
+    assert list(df["Result"]) == ["GOOD MATCH"]
+    assert session_state["analytics"]["results"]["OTHER"] == 0
+
+def extract(tmp_path, page_texts):
+    path = write_pdf(tmp_path, "resume.pdf", page_texts)
+    with open(path, 'rb') as f:
+        return app.extract_text_from_pdf(f)
+
+def test_only_sparse_pages_are_ocrd_and_merged_in_order(ocr_pages, tmp_path):
+    text = extract(tmp_path, ["Jordan Park, Regional Sales Manager at Acme", None, "References available on request"])
+
+    assert ocr_pages.pages == [1]
+    assert text.split("\n")[:3] == ["Jordan Park, Regional Sales Manager at Acme", "OCR text of page 2",
+                                    "References available on request"]
+
+def test_pdf_with_text_layer_skips_ocr(ocr_pages, tmp_path):
+    extract(tmp_path, ["Jordan Park, Regional Sales Manager at Acme"])
+    assert ocr_pages.pages == []
+
+def test_complete_ocr_results_are_cached(ocr_pages):
+    pdf_bytes = make_pdf([None, None])
+    assert app.ocr_pdf_pages(pdf_bytes, [0, 1]) == ({0: "OCR text of page 1", 1: "OCR text of page 2"}, True)
+    assert app.ocr_pdf_pages(pdf_bytes, [0, 1]) == ({0: "OCR text of page 1", 1: "OCR text of page 2"}, True)
+    assert sorted(ocr_pages.pages) == [0, 1]
+
+def test_timed_out_pages_are_incomplete_and_not_cached(ocr_pages):
+    pdf_bytes = make_pdf([None, None])
+    ocr_pages.handler = lambda pdf_bytes, page_index, deadline: "Page one text" if page_index == 0 else None
+
+    assert app.ocr_pdf_pages(pdf_bytes, [0, 1]) == ({0: "Page one text", 1: ""}, False)
+    app.ocr_pdf_pages(pdf_bytes, [0, 1])
+    assert sorted(ocr_pages.pages) == [0, 0, 1, 1]
+
+def test_failing_page_counts_as_empty(ocr_pages):
+    def fail_on_second_page(pdf_bytes, page_index, deadline):
+        if page_index == 1:
+            raise RuntimeError("tesseract failed")
+        return "Page one text"
+
+    ocr_pages.handler = fail_on_second_page
+    assert app.ocr_pdf_pages(make_pdf([None, None]), [0, 1]) == ({0: "Page one text", 1: ""}, True)
+
+def test_error_reason_when_ocr_is_not_installed(ocr_pages, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "OCR_AVAILABLE", False)
+    assert extract(tmp_path, [None]) == "Error reading resume.pdf: no text layer found (scanned PDF, OCR not installed)"
+    assert ocr_pages.pages == []
+
+def test_error_reason_when_ocr_runs_out_of_time(ocr_pages, tmp_path):
+    ocr_pages.handler = hang_until_deadline
+    assert extract(tmp_path, [None]) == "Error reading resume.pdf: OCR did not finish within the 0.5s time budget"
+
+def test_error_reason_when_ocr_finds_no_text(ocr_pages, tmp_path):
+    ocr_pages.handler = lambda pdf_bytes, page_index, deadline: "  "
+    assert extract(tmp_path, [None]) == "Error reading resume.pdf: no readable text found, even with OCR"
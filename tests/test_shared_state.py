@@ -0,0 +1,138 @@
+"""Tests for the caches, rate limiter, batch slots and session admission shared between workers."""
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app  # noqa: E402
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture(params=["memory", "sqlite"])
+def shared_state(request, monkeypatch, tmp_path):
+    """Run a test against the in-process state and against a shared SQLite file"""
+    monkeypatch.setattr(app, "SHARED_STATE_DB", str(tmp_path / "state.db") if request.param == "sqlite" else None)
+    monkeypatch.setattr(app, "SHARED_STATE_LOCAL", threading.local())
+    monkeypatch.setattr(app, "LOCAL_CACHES", {"results": app.OrderedDict(), "ocr": app.OrderedDict()})
+    monkeypatch.setattr(app, "API_CALL_TIMES", app.deque())
+    return request.param
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(app, "time", SimpleNamespace(time=clock.time, sleep=clock.sleep, monotonic=time.monotonic,
+                                                     perf_counter=time.perf_counter))
+    return clock
+
+@pytest.fixture
+def sqlite_state(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "SHARED_STATE_DB", str(tmp_path / "state.db"))
+    monkeypatch.setattr(app, "SHARED_STATE_LOCAL", threading.local())
+    return app.get_shared_db()
+
+def test_cache_evicts_least_recently_used(shared_state, clock):
+    app.cache_set("results", "a", {"Name": "A"}, 2)
+    clock.now += 1
+    app.cache_set("results", "b", {"Name": "B"}, 2)
+    clock.now += 1
+    assert app.cache_get("results", "a") == {"Name": "A"}
+    clock.now += 1
+    app.cache_set("results", "c", {"Name": "C"}, 2)
+
+    assert app.cache_get("results", "b") is None
+    assert app.cache_get("results", "a") == {"Name": "A"}
+    assert app.cache_get("results", "c") == {"Name": "C"}
+    # Namespaces are evicted independently
+    assert app.cache_get("ocr", "a") is None
+
+def test_cached_values_are_copies(shared_state):
+    app.cache_set("results", "a", {"Name": "A"}, 10)
+    app.cache_get("results", "a")["Name"] = "changed"
+    assert app.cache_get("results", "a") == {"Name": "A"}
+
+def test_api_slot_waits_for_the_sliding_window(shared_state, clock, monkeypatch):
+    monkeypatch.setattr(app, "CLAUDE_REQUESTS_PER_MINUTE", 2)
+    app.acquire_api_slot()
+    clock.now += 10
+    app.acquire_api_slot()
+    assert clock.sleeps == []
+
+    app.acquire_api_slot()
+    # The third call waits until the first call leaves the one minute window
+    assert clock.sleeps == [50]
+    assert clock.now == 1060
+
+def test_batch_slot_waits_for_a_live_lease(sqlite_state, monkeypatch):
+    monkeypatch.setattr(app, "MAX_CONCURRENT_BATCHES", 1)
+    monkeypatch.setattr(app, "BATCH_LEASE_SECONDS", 60)
+    sqlite_state.execute("INSERT INTO active_batches (batch_id, started_at) VALUES ('other-worker', ?)", (time.time(),))
+    entered = threading.Event()
+
+    def run_batch():
+        with app.batch_slot():
+            entered.set()
+
+    thread = threading.Thread(target=run_batch)
+    thread.start()
+    assert not entered.wait(0.3)
+
+    sqlite_state.execute("DELETE FROM active_batches WHERE batch_id = 'other-worker'")
+    thread.join(5)
+    assert entered.is_set()
+    assert sqlite_state.execute("SELECT COUNT(*) FROM active_batches").fetchone()[0] == 0
+
+def test_batch_slot_reclaims_an_expired_lease(sqlite_state, monkeypatch):
+    monkeypatch.setattr(app, "MAX_CONCURRENT_BATCHES", 1)
+    monkeypatch.setattr(app, "BATCH_LEASE_SECONDS", 60)
+    # A worker that crashed mid-batch never deletes its row
+    sqlite_state.execute("INSERT INTO active_batches (batch_id, started_at) VALUES ('crashed', ?)", (time.time() - 61,))
+
+    with app.batch_slot():
+        batch_ids = [row[0] for row in sqlite_state.execute("SELECT batch_id FROM active_batches")]
+    assert len(batch_ids) == 1 and batch_ids[0] != "crashed"
+
+def test_batch_slot_renews_its_lease_while_running(sqlite_state, monkeypatch):
+    monkeypatch.setattr(app, "MAX_CONCURRENT_BATCHES", 1)
+    monkeypatch.setattr(app, "BATCH_LEASE_SECONDS", 0.3)
+
+    with app.batch_slot():
+        started_at = sqlite_state.execute("SELECT started_at FROM active_batches").fetchone()[0]
+        time.sleep(0.5)
+        renewed_at = sqlite_state.execute("SELECT started_at FROM active_batches").fetchone()[0]
+    assert renewed_at > started_at
+
+def test_session_admission_allows_one_event_per_session_and_kind():
+    session_1 = SimpleNamespace(session_hash="session-1")
+    session_2 = SimpleNamespace(session_hash="session-2")
+
+    with app.session_admission(session_1, "analysis") as admitted:
+        assert admitted
+        with app.session_admission(session_1, "analysis") as second:
+            assert not second
+        with app.session_admission(session_2, "analysis") as other_session:
+            assert other_session
+        with app.session_admission(session_1, "rescore") as other_kind:
+            assert other_kind
+        # A rejected event must not release the admitted one's place
+        with app.session_admission(session_1, "analysis") as third:
+            assert not third
+
+    with app.session_admission(session_1, "analysis") as after_release:
+        assert after_release
+    # Direct calls without a Gradio request are always admitted
+    with app.session_admission(None, "analysis") as without_request:
+        assert without_request
@@ -0,0 +1,38 @@
+"""Tests for the session-affinity routing of the multi-worker proxy."""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from worker_proxy import AFFINITY_COOKIE, pick_worker, stable_index  # noqa: E402
+
+def scope(query_string=b"", client=("203.0.113.7", 51000)):
+    return {"type": "http", "query_string": query_string, "client": client}
+
+def test_affinity_cookie_wins():
+    headers = {"cookie": f"theme=dark; {AFFINITY_COOKIE}=2"}
+    assert pick_worker(scope(b"session_hash=abc"), headers, b"", 4) == (2, False)
+
+def test_out_of_range_cookie_is_reassigned():
+    # e.g. the service was restarted with fewer workers
+    headers = {"cookie": f"{AFFINITY_COOKIE}=7"}
+    index, set_cookie = pick_worker(scope(b"session_hash=abc"), headers, b"", 4)
+    assert (index, set_cookie) == (stable_index("abc", 4), True)
+
+def test_session_hash_routes_queue_join_and_data_to_the_same_worker():
+    body = json.dumps({"data": [], "fn_index": 0, "session_hash": "abc"}).encode()
+    join = pick_worker(scope(), {"content-type": "application/json"}, body, 4)
+    data = pick_worker(scope(b"session_hash=abc"), {}, b"", 4)
+    assert join == data == (stable_index("abc", 4), True)
+
+def test_requests_without_session_use_the_client_address():
+    direct = pick_worker(scope(client=("203.0.113.7", 51000)), {}, b"", 4)
+    forwarded = pick_worker(scope(client=("10.0.0.2", 443)), {"x-forwarded-for": "203.0.113.7, 10.0.0.1"}, b"", 4)
+    assert direct == forwarded == (stable_index("203.0.113.7", 4), True)
+
+def test_non_json_body_is_not_parsed():
+    headers = {"content-type": "multipart/form-data; boundary=x"}
+    assert pick_worker(scope(), headers, b'{"session_hash": "abc"}', 4) == (stable_index("203.0.113.7", 4), True)
+
+def test_sessions_spread_over_workers():
+    assert len({stable_index(f"session-{n}", 4) for n in range(50)}) == 4
@@ -0,0 +1,110 @@
+"""Session-affinity reverse proxy for multi-worker serving.
+
+Gradio keeps each event's queue state in the worker that accepted it, so every
+request of a session must reach the same worker. The proxy pins a browser to a
+worker with a cookie; clients without cookies (e.g. gradio_client) are routed
+by the Gradio session hash, falling back to the client address.
+"""
+import hashlib
+import json
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+import httpx
+
+AFFINITY_COOKIE = "resume_analyzer_worker"
+
+# Headers that describe a single connection and must not be forwarded
+HOP_BY_HOP_HEADERS = {"connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+                      "te", "trailers", "transfer-encoding", "upgrade"}
+
+def stable_index(key, count):
+    return int(hashlib.sha256(key.encode('utf-8')).hexdigest()[:8], 16) % count
+
+def pick_worker(scope, headers, body, count):
+    """Return (worker index, whether the affinity cookie must be set)"""
+    cookie = SimpleCookie(headers.get("cookie", ""))
+    if AFFINITY_COOKIE in cookie and cookie[AFFINITY_COOKIE].value.isdigit():
+        index = int(cookie[AFFINITY_COOKIE].value)
+        if index < count:
+            return index, False
+
+    session_hash = parse_qs(scope.get("query_string", b"").decode()).get("session_hash", [None])[0]
+    if session_hash is None and body and headers.get("content-type", "").startswith("application/json"):
+        try:
+            payload = json.loads(body)
+            session_hash = payload.get("session_hash") if isinstance(payload, dict) else None
+        except ValueError:
+            pass
+
+    if session_hash:
+        return stable_index(session_hash, count), True
+    client = headers.get("x-forwarded-for", "").split(",")[0].strip() or (scope.get("client") or ("",))[0]
+    return stable_index(client, count), True
+
+def create_proxy_app(worker_ports):
+    """ASGI app forwarding HTTP (including SSE streams) to the Gradio workers on worker_ports"""
+    http_client = httpx.AsyncClient(timeout=httpx.Timeout(30, read=None))
+
+    async def read_body(receive):
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                return body
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await http_client.aclose()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            # Gradio 4+ uses HTTP and server-sent events only
+            return
+
+        headers = {key.decode('latin-1').lower(): value.decode('latin-1') for key, value in scope["headers"]}
+        body = await read_body(receive)
+        index, set_cookie = pick_worker(scope, headers, body, len(worker_ports))
+
+        forward_headers = [(key, value) for key, value in headers.items() if key not in HOP_BY_HOP_HEADERS]
+        if scope.get("client"):
+            forwarded_for = headers.get("x-forwarded-for")
+            client_ip = scope["client"][0]
+            forward_headers = [(k, v) for k, v in forward_headers if k != "x-forwarded-for"]
+            forward_headers.append(("x-forwarded-for", f"{forwarded_for}, {client_ip}" if forwarded_for else client_ip))
+
+        path = scope.get("raw_path") or scope["path"].encode()
+        url = f"http://127.0.0.1:{worker_ports[index]}{path.decode('latin-1')}"
+        if scope.get("query_string") and b"?" not in path:
+            url += "?" + scope["query_string"].decode('latin-1')
+
+        try:
+            upstream = await http_client.send(
+                http_client.build_request(scope["method"], url, headers=forward_headers, content=body), stream=True)
+        except httpx.HTTPError:
+            await send({"type": "http.response.start", "status": 502,
+                        "headers": [(b"content-type", b"text/plain")]})
+            await send({"type": "http.response.body", "body": b"Worker unavailable, please retry"})
+            return
+
+        response_headers = [(key.encode('latin-1'), value.encode('latin-1'))
+                            for key, value in upstream.headers.multi_items() if key.lower() not in HOP_BY_HOP_HEADERS]
+        if set_cookie:
+            response_headers.append((b"set-cookie", f"{AFFINITY_COOKIE}={index}; Path=/; HttpOnly; SameSite=Lax".encode()))
+
+        await send({"type": "http.response.start", "status": upstream.status_code, "headers": response_headers})
+        try:
+            # Stream chunk by chunk so server-sent events reach the browser as they happen
+            async for chunk in upstream.aiter_raw():
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            await upstream.aclose()
+        await send({"type": "http.response.body", "body": b""})
+
+    return app